@@ -5,16 +5,17 @@ It prepares the 7-qubit state, applies the competing Z and X interactions, and
 computes classical mutual informations for geometric and randomized 2-qubit
 fragments.  The results cover the hypotheses H1 and H2 described in the notes.
 
-Usage: run the module directly with Python 3.  No external dependencies are
-required.  The script prints tables for both hypotheses.
+Usage: run the module directly with Python 3.  NumPy is the only external
+dependency.  The script prints tables for both hypotheses.
 """
 from __future__ import annotations
 
 import itertools
 import math
 from dataclasses import dataclass
-from typing import Callable, Dict, List, Sequence, Tuple
+from typing import Dict, List, Sequence, Tuple, Union
 
+import numpy as np
 
 QUBIT_COUNT = 7
 SYSTEM_QUBIT = 0
@@ -24,241 +25,248 @@ BLOCKS = {
     "block1": [3, 4],
     "block2": [5, 6],
 }
+# Columns of ExperimentResult.mi, in BLOCKS order, compared by the delta helpers.
+BLOCK0, BLOCK2 = 0, 2
+RANDOM_PAIRS = list(itertools.combinations(ENV_QUBITS, 2))
+# BITS[q][index] is the value of qubit q in the basis state ``index``.
+BITS = np.array(
+    [(np.arange(1 << QUBIT_COUNT) >> qubit) & 1 for qubit in range(QUBIT_COUNT)],
+    dtype=np.uint8,
+)
 
-Gate = Tuple[Tuple[complex, complex], Tuple[complex, complex]]
+# Every gate in the model is real and so is the initial state, so gates and
+# amplitudes are float64.  States are batched with shape (batch, 2**QUBIT_COUNT).
+# Kernels take either a single gate, applied to every row, or a stack with one
+# gate per row.
+Gate = np.ndarray
 
 
-@dataclass(frozen=True)
+# Rows of ExperimentResult.mi; the columns are the blocks in BLOCKS order.
+I_Z, I_X, I_Z_RANDOM, I_X_RANDOM = range(4)
+
+
+@dataclass(frozen=True, eq=False)
 class ExperimentResult:
     theta_z: float
     theta_x: float
-    i_z: Dict[str, float]
-    i_x: Dict[str, float]
-    i_z_random: Dict[str, float]
-    i_x_random: Dict[str, float]
+    mi: np.ndarray  # shape (4, 3): [I_Z, I_X, I_Z_RANDOM, I_X_RANDOM] x blocks
 
 
 SQRT1_2 = 1 / math.sqrt(2)
-HADAMARD: Gate = ((SQRT1_2, SQRT1_2), (SQRT1_2, -SQRT1_2))
+HADAMARD: Gate = np.array(((SQRT1_2, SQRT1_2), (SQRT1_2, -SQRT1_2)))
+X_BASIS: Dict[int, Gate] = {qubit: HADAMARD for qubit in range(QUBIT_COUNT)}
+
+
+def ry(theta: Union[float, np.ndarray]) -> Gate:
+    """Return the single-qubit Ry rotation matrix, stacked over ``theta``."""
+    theta = np.asarray(theta, dtype=np.float64)
+    c = np.cos(theta / 2)
+    s = np.sin(theta / 2)
+    return np.stack((np.stack((c, -s), axis=-1), np.stack((s, c), axis=-1)), axis=-2)
 
 
-def ry(theta: float) -> Gate:
-    """Return the single-qubit Ry rotation matrix."""
-    c = math.cos(theta / 2)
-    s = math.sin(theta / 2)
-    return ((c, -s), (s, c))
+def x_controlled_ry(theta: Union[float, np.ndarray]) -> np.ndarray:
+    """Return (H x I) CRy(theta) (H x I), an Ry controlled on the X basis.
 
+    Rows and columns are indexed by ``2 * control_bit + target_bit``.
+    """
+    theta = np.asarray(theta, dtype=np.float64)
+    controlled = np.zeros(theta.shape + (4, 4))
+    controlled[..., 0, 0] = controlled[..., 1, 1] = 1.0
+    controlled[..., 2:, 2:] = ry(theta)
+    sandwich = np.kron(HADAMARD, np.eye(2))
+    return sandwich @ controlled @ sandwich
 
-def apply_single_qubit_gate(state: List[complex], gate: Gate, qubit: int) -> List[complex]:
-    dim = len(state)
+
+def apply_single_qubit_gate(state: np.ndarray, gate: Gate, qubit: int) -> None:
     step = 1 << qubit
-    period = step << 1
-    result = state[:]
-    for start in range(0, dim, period):
-        for offset in range(step):
-            i0 = start + offset
-            i1 = i0 + step
-            a0 = state[i0]
-            a1 = state[i1]
-            result[i0] = gate[0][0] * a0 + gate[0][1] * a1
-            result[i1] = gate[1][0] * a0 + gate[1][1] * a1
-    return result
+    # Viewing each row as blocks of length 2 * step puts every amplitude with
+    # the qubit cleared in the first half and its partner in the second half.
+    view = state.reshape(len(state), -1, 2, step)
+    view[...] = np.einsum("...ij,...njk->...nik", gate, view)
 
 
 def apply_controlled_gate(
-    state: List[complex], control: int, target: int, gate: Gate
-) -> List[complex]:
-    dim = len(state)
-    control_mask = 1 << control
-    target_mask = 1 << target
-    result = state[:]
-    for index in range(dim):
-        if (index & control_mask) and not (index & target_mask):
-            i0 = index
-            i1 = index | target_mask
-            a0 = state[i0]
-            a1 = state[i1]
-            result[i0] = gate[0][0] * a0 + gate[0][1] * a1
-            result[i1] = gate[1][0] * a0 + gate[1][1] * a1
-    return result
-
-
-def initial_state() -> List[complex]:
-    """Return |+>_S tensor |000000>_E."""
-    state = [0j] * (1 << QUBIT_COUNT)
+    state: np.ndarray, control: int, target: int, gate: Gate
+) -> None:
+    indices = np.arange(state.shape[1])
+    mask = ((indices >> control) & 1 == 1) & ((indices >> target) & 1 == 0)
+    i0 = indices[mask]
+    pairs = np.stack((i0, i0 | (1 << target)))
+    state[:, pairs] = np.einsum("...ij,...jk->...ik", gate, state[:, pairs])
+
+
+def apply_two_qubit_gate(
+    state: np.ndarray, control: int, target: int, gate: np.ndarray
+) -> None:
+    indices = np.arange(state.shape[1])
+    i0 = indices[((indices >> control) & 1 == 0) & ((indices >> target) & 1 == 0)]
+    i1 = i0 | (1 << target)
+    i2 = i0 | (1 << control)
+    groups = np.stack((i0, i1, i2, i2 | (1 << target)))
+    state[:, groups] = np.einsum("...ij,...jk->...ik", gate, state[:, groups])
+
+
+def initial_state(batch: int = 1) -> np.ndarray:
+    """Return ``batch`` copies of |+>_S tensor |000000>_E."""
+    state = np.zeros((batch, 1 << QUBIT_COUNT))
     norm = SQRT1_2
-    state[0] = complex(norm, 0.0)
-    state[1 << SYSTEM_QUBIT] = complex(norm, 0.0)
+    state[:, 0] = norm
+    state[:, 1 << SYSTEM_QUBIT] = norm
     return state
 
 
-def apply_z_coupling(state: List[complex], theta_z: float) -> List[complex]:
+def apply_z_coupling(state: np.ndarray, theta_z: np.ndarray) -> None:
     gate = ry(theta_z)
-    result = state
     for qubit in BLOCKS["block0"]:
-        result = apply_controlled_gate(result, SYSTEM_QUBIT, qubit, gate)
-    return result
+        apply_controlled_gate(state, SYSTEM_QUBIT, qubit, gate)
 
 
-def apply_x_coupling(state: List[complex], theta_x: float) -> List[complex]:
-    if math.isclose(theta_x, 0.0, abs_tol=1e-12):
-        return state
-    gate = ry(theta_x)
-    result = apply_single_qubit_gate(state, HADAMARD, SYSTEM_QUBIT)
+def apply_x_coupling(state: np.ndarray, theta_x: np.ndarray) -> None:
+    # The Hadamards between consecutive sandwiches cancel, so each coupling
+    # can be applied as one fused two-qubit gate.  Rows without an X coupling
+    # get an exact identity rather than the rounded product of Hadamards.
+    gate = x_controlled_ry(theta_x)
+    gate[np.isclose(theta_x, 0.0, rtol=0.0, atol=1e-12)] = np.eye(4)
     for qubit in BLOCKS["block2"]:
-        result = apply_controlled_gate(result, SYSTEM_QUBIT, qubit, gate)
-    result = apply_single_qubit_gate(result, HADAMARD, SYSTEM_QUBIT)
-    return result
+        apply_two_qubit_gate(state, SYSTEM_QUBIT, qubit, gate)
 
 
-def full_state(theta_z: float, theta_x: float) -> List[complex]:
-    state = initial_state()
-    state = apply_z_coupling(state, theta_z)
-    state = apply_x_coupling(state, theta_x)
+def full_states(theta_z: np.ndarray, theta_x: np.ndarray) -> np.ndarray:
+    """Return one prepared state per pair of coupling angles."""
+    state = initial_state(len(theta_z))
+    apply_z_coupling(state, theta_z)
+    apply_x_coupling(state, theta_x)
     # The gates are unitary, but floating point accumulation can introduce
     # slight deviations from unit norm.  Renormalize defensively so that the
     # downstream probability calculations never see a negative value from
     # rounding error.
-    norm = math.sqrt(sum(a.real * a.real + a.imag * a.imag for a in state))
-    if not math.isclose(norm, 1.0, rel_tol=1e-12, abs_tol=1e-12):
-        state = [amp / norm for amp in state]
+    norm = np.sqrt(np.einsum("bi,bi->b", state, state))
+    drifted = ~np.isclose(norm, 1.0, rtol=1e-12, atol=1e-12)
+    state[drifted] /= norm[drifted, np.newaxis]
     return state
 
 
-def apply_basis_transforms(state: List[complex], basis_ops: Dict[int, Gate]) -> List[complex]:
-    result = state
+def apply_basis_transforms(state: np.ndarray, basis_ops: Dict[int, Gate]) -> None:
     for qubit, gate in basis_ops.items():
-        result = apply_single_qubit_gate(result, gate, qubit)
-    return result
+        apply_single_qubit_gate(state, gate, qubit)
 
 
-def joint_distribution(state: List[complex], measured_qubits: Sequence[int]) -> List[float]:
+def joint_distribution(state: np.ndarray, measured_qubits: Sequence[int]) -> np.ndarray:
+    batch, dim = state.shape
     outcome_count = 1 << len(measured_qubits)
-    probs = [0.0] * outcome_count
-    for index, amp in enumerate(state):
-        prob = amp.real * amp.real + amp.imag * amp.imag
-        if prob == 0.0:
-            continue
-        outcome = 0
-        for pos, qubit in enumerate(measured_qubits):
-            if index & (1 << qubit):
-                outcome |= 1 << pos
-        probs[outcome] += prob
-    return probs
-
-
-def mutual_information_from_distribution(joint: List[float]) -> float:
-    p_s = [0.0, 0.0]
-    block_states = len(joint) // 2
-    p_b = [0.0 for _ in range(block_states)]
-    for idx, prob in enumerate(joint):
-        s = idx & 1
-        b = idx >> 1
-        p_s[s] += prob
-        p_b[b] += prob
-    mi = 0.0
-    for idx, prob in enumerate(joint):
-        if prob <= 0.0:
-            continue
-        s = idx & 1
-        b = idx >> 1
-        denom = p_s[s] * p_b[b]
-        if denom <= 0.0:
-            continue
-        mi += prob * math.log2(prob / denom)
-    return mi
-
-
-def block_mutual_information(
-    state: List[complex],
-    block: Sequence[int],
-    basis_ops: Dict[int, Gate],
-) -> float:
-    transformed = apply_basis_transforms(state, basis_ops)
+    outcomes = np.zeros(dim, dtype=np.intp)
+    for pos, qubit in enumerate(measured_qubits):
+        outcomes |= BITS[qubit].astype(np.intp) << pos
+    probs = state * state
+    # Offsetting each row's outcomes by a multiple of outcome_count lets a
+    # single bincount reduce the whole batch.
+    bins = outcomes + outcome_count * np.arange(batch)[:, np.newaxis]
+    return np.bincount(
+        bins.ravel(), weights=probs.ravel(), minlength=batch * outcome_count
+    ).reshape(batch, outcome_count)
+
+
+def mutual_information_from_distribution(joint: np.ndarray) -> np.ndarray:
+    # Outcome indices hold the system bit in the least significant position,
+    # so rows of the reshaped table are block outcomes and columns are s.
+    joint = np.asarray(joint, dtype=np.float64)
+    table = joint.reshape(joint.shape[:-1] + (-1, 2))
+    p_s = table.sum(axis=-2)
+    p_b = table.sum(axis=-1)
+    outer = np.einsum("...b,...s->...bs", p_b, p_s).reshape(joint.shape)
+    mask = (joint > 0.0) & (outer > 0.0)
+    ratio = np.divide(joint, outer, out=np.ones_like(joint), where=mask)
+    return np.sum(joint * np.log2(ratio), axis=-1)
+
+
+def block_mutual_information(state: np.ndarray, block: Sequence[int]) -> np.ndarray:
     measured = [SYSTEM_QUBIT, *block]
-    joint = joint_distribution(transformed, measured)
+    joint = joint_distribution(state, measured)
     return mutual_information_from_distribution(joint)
 
 
-def mutual_information_table(
-    state: List[complex], basis_map_factory: Callable[[Sequence[int]], Dict[int, Gate]]
-) -> Dict[str, float]:
-    return {
-        name: block_mutual_information(state, qubits, basis_map_factory(qubits))
-        for name, qubits in BLOCKS.items()
-    }
-
-
-def random_block_tables(
-    state: List[complex], basis_map_factory: Callable[[Sequence[int]], Dict[int, Gate]]
-) -> Dict[str, float]:
-    totals = {"block0": 0.0, "block1": 0.0, "block2": 0.0}
-    permutations = list(itertools.permutations(ENV_QUBITS))
-    for perm in permutations:
-        blocks = {
-            "block0": [perm[0], perm[1]],
-            "block1": [perm[2], perm[3]],
-            "block2": [perm[4], perm[5]],
-        }
-        for name, qubits in blocks.items():
-            basis_ops = basis_map_factory(qubits)
-            mi = block_mutual_information(state, qubits, basis_ops)
-            totals[name] += mi
-    count = float(len(permutations))
-    return {name: value / count for name, value in totals.items()}
+def mutual_information_table(state: np.ndarray) -> np.ndarray:
+    return np.stack([block_mutual_information(state, qubits) for qubits in BLOCKS.values()])
+
+
+def random_block_tables(state: np.ndarray) -> np.ndarray:
+    # Averaging over every permutation of the environment qubits puts each
+    # unordered pair into each block slot equally often, and the mutual
+    # information does not depend on the order within a block.  The average
+    # is therefore the mean over the pairs, and identical for all slots.
+    total = sum(block_mutual_information(state, pair) for pair in RANDOM_PAIRS)
+    mean = total / len(RANDOM_PAIRS)
+    return np.stack([mean] * len(BLOCKS))
+
+
+def run_experiments(angles: Sequence[Tuple[float, float]]) -> List[ExperimentResult]:
+    """Run one experiment per ``(theta_z, theta_x)`` pair as a single batch."""
+    if not angles:
+        return []
+    theta_z = np.array([pair[0] for pair in angles], dtype=np.float64)
+    theta_x = np.array([pair[1] for pair in angles], dtype=np.float64)
+    state = full_states(theta_z, theta_x)
+    # Measuring in the X basis means a Hadamard on the system and on the
+    # block qubits.  A Hadamard on a traced-out qubit leaves the marginal
+    # unchanged, so rotating every qubit once serves all blocks.
+    state_x = state.copy()
+    apply_basis_transforms(state_x, X_BASIS)
+
+    mi = np.stack(
+        (
+            mutual_information_table(state),
+            mutual_information_table(state_x),
+            random_block_tables(state),
+            random_block_tables(state_x),
+        )
+    )
+    return [
+        ExperimentResult(angle_z, angle_x, np.ascontiguousarray(mi[:, :, row]))
+        for row, (angle_z, angle_x) in enumerate(angles)
+    ]
 
 
 def run_experiment(theta_z: float, theta_x: float) -> ExperimentResult:
-    state = full_state(theta_z, theta_x)
-
-    def z_basis(_: Sequence[int]) -> Dict[int, Gate]:
-        return {}
-
-    def x_basis(qubits: Sequence[int]) -> Dict[int, Gate]:
-        mapping: Dict[int, Gate] = {SYSTEM_QUBIT: HADAMARD}
-        for qubit in qubits:
-            mapping[qubit] = HADAMARD
-        return mapping
-
-    i_z = mutual_information_table(state, z_basis)
-    i_x = mutual_information_table(state, x_basis)
-    i_z_rand = random_block_tables(state, z_basis)
-    i_x_rand = random_block_tables(state, x_basis)
-
-    return ExperimentResult(theta_z, theta_x, i_z, i_x, i_z_rand, i_x_rand)
+    return run_experiments([(theta_z, theta_x)])[0]
 
 
 def delta_geometry(result: ExperimentResult, pointer: str) -> float:
     if pointer == "Z":
-        return result.i_z["block0"] - result.i_z["block2"]
+        return float(result.mi[I_Z, BLOCK0] - result.mi[I_Z, BLOCK2])
     if pointer == "X":
-        return result.i_x["block2"] - result.i_x["block0"]
+        return float(result.mi[I_X, BLOCK2] - result.mi[I_X, BLOCK0])
     raise ValueError(f"Unknown pointer {pointer}")
 
 
 def delta_random(result: ExperimentResult, pointer: str) -> float:
     if pointer == "Z":
-        return result.i_z_random["block0"] - result.i_z_random["block2"]
+        return float(result.mi[I_Z_RANDOM, BLOCK0] - result.mi[I_Z_RANDOM, BLOCK2])
     if pointer == "X":
-        return result.i_x_random["block2"] - result.i_x_random["block0"]
+        return float(result.mi[I_X_RANDOM, BLOCK2] - result.mi[I_X_RANDOM, BLOCK0])
     raise ValueError(f"Unknown pointer {pointer}")
 
 
 def redundancy(result: ExperimentResult, pointer: str) -> float:
     if pointer == "Z":
-        return max(result.i_z.values())
+        return float(result.mi[I_Z].max())
     if pointer == "X":
-        return max(result.i_x.values())
+        return float(result.mi[I_X].max())
     raise ValueError(f"Unknown pointer {pointer}")
 
 
+def block_table(result: ExperimentResult, row: int) -> Dict[str, float]:
+    """Return one row of ``result.mi`` keyed by block name, for display."""
+    return {name: float(value) for name, value in zip(BLOCKS, result.mi[row])}
+
+
 def print_h1_results(result: ExperimentResult, label: str) -> None:
     print(f"\nH1 – {label}")
     print(f"theta_Z={result.theta_z:.3f}, theta_X={result.theta_x:.3f}")
-    print("I_Z geom:", result.i_z)
-    print("I_Z rand:", result.i_z_random)
-    print("I_X geom:", result.i_x)
-    print("I_X rand:", result.i_x_random)
+    print("I_Z geom:", block_table(result, I_Z))
+    print("I_Z rand:", block_table(result, I_Z_RANDOM))
+    print("I_X geom:", block_table(result, I_X))
+    print("I_X rand:", block_table(result, I_X_RANDOM))
     print(
         f"Delta_Z geom={delta_geometry(result, 'Z'):.4f}, rand={delta_random(result, 'Z'):.4f}"
     )
@@ -280,24 +288,28 @@ def print_h2_results(single: ExperimentResult, diagonal: ExperimentResult, label
 
 
 def main() -> None:
+    h2_thetas = (math.pi / 6, math.pi / 4)
+    angles = [(0.0, 0.0), (math.pi / 4, math.pi / 12), (math.pi / 12, math.pi / 4)]
+    for theta in h2_thetas:
+        angles += [(theta, 0.0), (0.0, theta), (theta, theta)]
+    uncoupled, dominated_z, dominated_x, *h2_results = run_experiments(angles)
+
     # Sanity check: with no couplings active, every mutual information entry
     # should be numerically zero.  This guards against wiring mistakes in the
     # measurement bookkeeping.
-    uncoupled = run_experiment(0.0, 0.0)
     zero_tol = 1e-10
-    assert all(abs(v) < zero_tol for v in uncoupled.i_z.values())
-    assert all(abs(v) < zero_tol for v in uncoupled.i_x.values())
-
-    dominated_z = run_experiment(math.pi / 4, math.pi / 12)
-    dominated_x = run_experiment(math.pi / 12, math.pi / 4)
+    assert np.all(np.abs(uncoupled.mi[I_Z]) < zero_tol)
+    assert np.all(np.abs(uncoupled.mi[I_X]) < zero_tol)
 
     print_h1_results(dominated_z, "Z-dominated regime")
     print_h1_results(dominated_x, "X-dominated regime")
 
-    for theta in (math.pi / 6, math.pi / 4):
-        single_z = run_experiment(theta, 0.0)
-        single_x = run_experiment(0.0, theta)
-        diagonal = run_experiment(theta, theta)
+    for index, theta in enumerate(h2_thetas):
+        # single_x cannot be derived from single_z by swapping the bases and
+        # relabelling block0 <-> block2: the system starts in |+>, an
+        # eigenstate of X, so the X coupling on its own leaves the state
+        # unchanged while the Z coupling does not.
+        single_z, single_x, diagonal = h2_results[3 * index : 3 * index + 3]
         print_h2_results(single_z, diagonal, f"Z edge {theta:.3f}")
         print_h2_results(single_x, diagonal, f"X edge {theta:.3f}")
 